@@ -2,20 +2,31 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, date, time, timedelta, timezone
-import re, math, calendar as cal_mod, os
-from urllib.parse import urlencode
-from urllib.request import urlopen
-import xml.etree.ElementTree as ET
+import re, math, calendar as cal_mod, os, functools, bisect, heapq, json
 import streamlit as st
 from zoneinfo import ZoneInfo
-try:
-    from korean_lunar_calendar import KoreanLunarCalendar
-    HAS_LUNAR = True
-except Exception:
-    HAS_LUNAR = False
+@st.cache_resource
+def _lunar_backend():
+    try:
+        from korean_lunar_calendar import KoreanLunarCalendar
+        return KoreanLunarCalendar
+    except Exception:
+        return None
+
+HAS_LUNAR = _lunar_backend() is not None
+
+@st.cache_resource
+def _sxtwl_backend():
+    # C++ 기반 sxtwl이 깔려 있으면 순수 파이썬 korean_lunar_calendar보다 우선 사용
+    try:
+        import sxtwl
+        return sxtwl
+    except Exception:
+        return None
 
 from korea_tz_history import wall_to_true_solar_time   # ← 이 줄 추가
 
+@functools.lru_cache(maxsize=1)
 def get_kasi_key():
     try:
         val = st.secrets.get('KASI_KEY')
@@ -23,7 +34,44 @@ def get_kasi_key():
     except Exception: pass
     return os.getenv('KASI_KEY')
 
+KASI_LUNAR_URL = 'https://apis.data.go.kr/B090041/openapi/service/LrsrCldInfoService/getSolCalInfo'
+# KASI 응답은 소형 XML이라 DOM 없이 정규식으로 바로 뽑는다.
+# 단, item 자식 요소는 알파벳순(solDay…solMonth…solYear)으로 직렬화되므로
+# 순서를 가정하지 않고 태그별로 따로 찾는다
+_KASI_SOL_Y_RE = re.compile(rb'<solYear>(\d+)</solYear>')
+_KASI_SOL_M_RE = re.compile(rb'<solMonth>(\d+)</solMonth>')
+_KASI_SOL_D_RE = re.compile(rb'<solDay>(\d+)</solDay>')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+@st.cache_resource
+def _http_session():
+    # TLS 핸드셰이크 재사용을 위해 프로세스당 한 개의 커넥션 풀 유지
+    import requests
+    from requests.adapters import HTTPAdapter
+    s = requests.Session()
+    s.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+    return s
+
+@st.cache_data(show_spinner=False, max_entries=2048)
+def kasi_lunar_to_solar(lun_year, lun_month, lun_day):
+    """KASI 음양력 API로 음력→양력 변환. 결과는 (y,m,d) 튜플, 실패 시 None."""
+    key = get_kasi_key()
+    if not key: return None
+    params = {'serviceKey': key, 'lunYear': f'{lun_year:04d}', 'lunMonth': f'{lun_month:02d}', 'lunDay': f'{lun_day:02d}'}
+    try:
+        r = _http_session().get(KASI_LUNAR_URL, params=params, timeout=(2, 5))
+        body = r.content
+        my = _KASI_SOL_Y_RE.search(body); mm = _KASI_SOL_M_RE.search(body); md = _KASI_SOL_D_RE.search(body)
+        if my and mm and md: return (int(my[1]), int(mm[1]), int(md[1]))
+    except Exception:
+        pass
+    return None
+
 LOCAL_TZ = ZoneInfo('Asia/Seoul')
+LOCAL_TZ_FIXED = timezone(timedelta(hours=9))  # 1989년 이후 KST는 고정 +09:00 (DST 없음)
+def to_local(dt):
+    # 오프셋이 상수인 구간은 ZoneInfo.fromutc 경로를 건너뛴다
+    return dt.astimezone(LOCAL_TZ_FIXED if dt.year >= 1989 else LOCAL_TZ)
 DEFAULT_LONGITUDE = 126.9780  # 서울 기본값
 
 city_options = {
@@ -52,8 +100,14 @@ JIE_TO_MONTH_JI = {'입춘':'인','경칩':'묘','청명':'진','입하':'사','
 MONTH_TO_2TERMS = {'인':('입춘','우수'),'묘':('경칩','춘분'),'진':('청명','곡우'),'사':('입하','소만'),'오':('망종','하지'),'미':('소서','대서'),'신':('입추','처서'),'유':('백로','추분'),'술':('한로','상강'),'해':('입동','소설'),'자':('대설','동지'),'축':('소한','대한')}
 GAN_BG = {'갑':'#2ecc71','을':'#2ecc71','병':'#e74c3c','정':'#e74c3c','무':'#f1c40f','기':'#f1c40f','경':'#ffffff','신':'#ffffff','임':'#000000','계':'#000000'}
 BR_BG = {'해':'#000000','자':'#000000','인':'#2ecc71','묘':'#2ecc71','사':'#e74c3c','오':'#e74c3c','신':'#ffffff','유':'#ffffff','진':'#f1c40f','술':'#f1c40f','축':'#f1c40f','미':'#f1c40f'}
-def gan_fg(gan): bg=GAN_BG.get(gan,'#fff'); return '#000000' if bg in ('#ffffff','#f1c40f') else '#ffffff'
-def br_fg(ji): bg=BR_BG.get(ji,'#fff'); return '#000000' if bg in ('#ffffff','#f1c40f') else '#ffffff'
+def _fg_for_bg(bg): return '#000000' if bg in ('#ffffff','#f1c40f') else '#ffffff'
+GAN_FG = {g:_fg_for_bg(GAN_BG[g]) for g in GAN_BG}
+BR_FG = {j:_fg_for_bg(BR_BG[j]) for j in BR_BG}
+def gan_fg(gan): return GAN_FG.get(gan,'#ffffff')
+def br_fg(ji): return BR_FG.get(ji,'#ffffff')
+# (배경색, 글자색) 쌍 테이블 — 셀 렌더링 시 조회 2회를 1회로
+GAN_CELL = {g:(GAN_BG[g],GAN_FG[g]) for g in GAN_BG}
+BR_CELL = {j:(BR_BG[j],BR_FG[j]) for j in BR_BG}
 STEM_ELEM = {'갑':'목','을':'목','병':'화','정':'화','무':'토','기':'토','경':'금','신':'금','임':'수','계':'수'}
 STEM_YY = {'갑':'양','을':'음','병':'양','정':'음','무':'양','기':'음','경':'양','신':'음','임':'양','계':'음'}
 BRANCH_MAIN = {'자':'계','축':'기','인':'갑','묘':'을','진':'무','사':'병','오':'정','미':'기','신':'경','유':'신','술':'무','해':'임'}
@@ -62,13 +116,21 @@ ELEM_CONTROL = {'목':'토','화':'금','토':'수','금':'목','수':'화'}
 ELEM_OVER_ME = {v:k for k,v in ELEM_CONTROL.items()}
 ELEM_PROD_ME = {v:k for k,v in ELEM_PRODUCE.items()}
 SAMHAP = {'화':{'인','오','술'},'목':{'해','묘','미'},'수':{'신','자','진'},'금':{'사','유','축'}}
-MONTH_SAMHAP = {'인':'화','오':'화','술':'화','해':'목','묘':'목','미':'목','신':'수','자':'수','진':'수','사':'금','유':'금','축':'금'}
+MONTH_SAMHAP = {'인':'화','오':'화','술':'화','해':'목','묘':'목','미':'목','신':'수','자':'수','진':'수','사':'금','유':'금','축':'금'}  # 12지지 전부 커버(중복/누락 없음)
+# 월지별 삼합 나머지 두 지지 — 호출마다 set 차집합을 다시 만들지 않는다
+SAMHAP_OTHERS = {b: frozenset(SAMHAP[e]-{b}) for b,e in MONTH_SAMHAP.items()}
 BRANCH_HIDDEN = {'자':['임','계'],'축':['계','신','기'],'인':['무','병','갑'],'묘':['갑','을'],'진':['을','계','무'],'사':['무','경','병'],'오':['병','기','정'],'미':['정','을','기'],'신':['무','임','경'],'유':['경','신'],'술':['신','정','무'],'해':['무','갑','임']}
 NOTEARTH = {'갑','을','병','정','경','신','임','계'}
-def stems_of_element(elem): return {'목':['갑','을'],'화':['병','정'],'토':['무','기'],'금':['경','신'],'수':['임','계']}[elem]
+STEMS_OF_ELEM = {'목':['갑','을'],'화':['병','정'],'토':['무','기'],'금':['경','신'],'수':['임','계']}
+def stems_of_element(elem): return STEMS_OF_ELEM[elem]
 def stem_with_polarity(elem, parity): a,b=stems_of_element(elem); return a if parity=='양' else b
-def is_yang_stem(gan): return gan in ['갑','병','무','경','임']
-def ten_god_for_stem(day_stem, other_stem):
+YANG_STEMS = frozenset({'갑','병','무','경','임'})
+def is_yang_stem(gan): return gan in YANG_STEMS
+# 월지 -> 격국 그룹(자오묘유/인신사해/진술축미) — 호출마다 집합 포함 검사를 반복하지 않는다
+MONTH_GRP = {'자':'자오묘유','오':'자오묘유','묘':'자오묘유','유':'자오묘유',
+             '인':'인신사해','신':'인신사해','사':'인신사해','해':'인신사해',
+             '진':'진술축미','술':'진술축미','축':'진술축미','미':'진술축미'}
+def _ten_god_calc(day_stem, other_stem):
     d_e,d_p = STEM_ELEM[day_stem],STEM_YY[day_stem]
     o_e,o_p = STEM_ELEM[other_stem],STEM_YY[other_stem]
     if o_e==d_e: return '비견' if o_p==d_p else '겁재'
@@ -77,7 +139,15 @@ def ten_god_for_stem(day_stem, other_stem):
     if o_e==ELEM_OVER_ME[d_e]: return '편관' if o_p==d_p else '정관'
     if o_e==ELEM_PROD_ME[d_e]: return '편인' if o_p==d_p else '정인'
     return '미정'
-def ten_god_for_branch(day_stem, branch): return ten_god_for_stem(day_stem, BRANCH_MAIN[branch])
+
+STEM_IDX = {s:i for i,s in enumerate(CHEONGAN)}
+JI_IDX = {j:i for i,j in enumerate(JIJI)}
+# 일간×천간 십성 10×10 매트릭스 — 호출마다 오행/음양 판정을 다시 하지 않는다
+TEN_GOD_TABLE = [[_ten_god_calc(ds,o) for o in CHEONGAN] for ds in CHEONGAN]
+def ten_god_for_stem(day_stem, other_stem): return TEN_GOD_TABLE[STEM_IDX[day_stem]][STEM_IDX[other_stem]]
+# 일간×지지 십성 10×12 매트릭스 — 렌더링 루프마다 본기 치환을 다시 하지 않는다
+TEN_GOD_BRANCH = {ds: {b: ten_god_for_stem(ds, BRANCH_MAIN[b]) for b in JIJI} for ds in CHEONGAN}
+def ten_god_for_branch(day_stem, branch): return TEN_GOD_BRANCH[day_stem][branch]
 def six_for_stem(ds,s): return ten_god_for_stem(ds,s)
 def six_for_branch(ds,b): return ten_god_for_branch(ds,b)
 def all_hidden_stems(branches):
@@ -88,16 +158,24 @@ def is_first_half_by_terms(dt_solar, first_term_dt, mid_term_dt): return first_t
 
 JIE_DEGREES = {'입춘':315,'경칩':345,'청명':15,'입하':45,'망종':75,'소서':105,'입추':135,'백로':165,'한로':195,'입동':225,'대설':255,'소한':285}
 JIE_ORDER = ['입춘','경칩','청명','입하','망종','소서','입추','백로','한로','입동','대설','소한']
+# 선형 .index() 탐색 대신 쓰는 역방향 인덱스 맵
+MONTH_JI_IDX = {j:i for i,j in enumerate(MONTH_JI)}
+JIE_ORDER_IDX = {n:i for i,n in enumerate(JIE_ORDER)}
 JIE24_DEGREES = {'입춘':315,'우수':330,'경칩':345,'춘분':0,'청명':15,'곡우':30,'입하':45,'소만':60,'망종':75,'하지':90,'소서':105,'대서':120,'입추':135,'처서':150,'백로':165,'추분':180,'한로':195,'상강':210,'입동':225,'소설':240,'대설':255,'동지':270,'소한':285,'대한':300}
 JIE24_ORDER = ['입춘','우수','경칩','춘분','청명','곡우','입하','소만','망종','하지','소서','대서','입추','처서','백로','추분','한로','상강','입동','소설','대설','동지','소한','대한']
 SIDU_START = {('갑','기'):'갑',('을','경'):'병',('병','신'):'무',('정','임'):'경',('무','계'):'임'}
 def month_start_gan_idx(year_gan_idx): return ((year_gan_idx % 5) * 2 + 2) % 10
 K_ANCHOR = 49
+GANJI60 = tuple(CHEONGAN[i%10]+JIJI[i%12] for i in range(60))
+# (간지, 천간idx, 지지idx) 60갑자 주기 — 연주 계산에서 모듈로 2회·리스트 색인 2회를 줄인다
+YEAR_GANJI_CYCLE = tuple((GANJI60[i], i%10, i%12) for i in range(60))
+GANJI_PAIR60 = tuple((g[0], g[1]) for g in GANJI60)
 
 def jdn_0h_utc(y,m,d):
-    if m<=2: y-=1; m+=12
-    A=y//100; B=2-A+A//4
-    return int(365.25*(y+4716))+int(30.6001*(m+1))+d+B-1524
+    # 2월을 연말로 돌리는 계산용 달력: 분기 없는 정수식 (기존 공식과 동일 결과)
+    c=(m<3)
+    y0=y+4800-c; m0=m+12*c-3
+    return d+(153*m0+2)//5+(1461*y0)//4-y0//100+y0//400-32045
 
 def jd_from_utc(dt_utc):
     y=dt_utc.year; m=dt_utc.month
@@ -128,17 +206,10 @@ def equation_of_time_minutes(dt_utc):
     B = math.radians((360/365) * (doy - 81))
     return 9.87*math.sin(2*B) - 7.53*math.cos(B) - 1.5*math.sin(B)
     
-def solar_longitude_deg(dt_utc):
-    # 1️⃣ ΔT 보정 (UT → TT)
-    dt_tt = dt_utc + timedelta(seconds=delta_t_seconds(dt_utc.year))
-
-    # 2️⃣ TT 기준 JD 계산
-    JD = jd_from_utc(dt_tt)
+def _solar_lon_tt(jd_tt):
+    """TT 기준 JD(float) → 태양 황경(도). 순수 수치 커널 (datetime 비사용)."""
+    T = (jd_tt - 2451545.0) / 36525.0
 
-    # 3️⃣ T 다시 계산
-    T = (JD - 2451545.0) / 36525.0
-
-    # 4️⃣ 태양 황경 계산
     L0 = norm360(280.46646 + 36000.76983*T + 0.0003032*T*T)
     M  = norm360(357.52911 + 35999.05029*T - 0.0001537*T*T)
 
@@ -155,127 +226,219 @@ def solar_longitude_deg(dt_utc):
 
     return norm360(lam)
 
+def solar_longitude_deg(dt_utc):
+    # ΔT 보정 (UT → TT) 후 수치 커널 호출
+    dt_tt = dt_utc + timedelta(seconds=delta_t_seconds(dt_utc.year))
+    return _solar_lon_tt(jd_from_utc(dt_tt))
+
 def find_longitude_time_local(year, target_deg, approx_dt_local):
-    a=(approx_dt_local-timedelta(days=7)).astimezone(timezone.utc)
-    b=(approx_dt_local+timedelta(days=7)).astimezone(timezone.utc)
-    def f(dt_utc): return wrap180(solar_longitude_deg(dt_utc)-target_deg)
-    scan,step=a,timedelta(hours=6); fa=f(scan); found=False
-    while scan<b:
-        scan2=scan+step; fb=f(scan2)
-        if fa==0 or fb==0 or (fa<0 and fb>0) or (fa>0 and fb<0): a,b=scan,scan2; found=True; break
-        scan,fa=scan2,fb
-    if not found:
-        a=(approx_dt_local-timedelta(days=1)).astimezone(timezone.utc)
-        b=(approx_dt_local+timedelta(days=1)).astimezone(timezone.utc)
-    for _ in range(100):
-        mid=a+(b-a)/2; fm=f(mid); fa=f(a)
-        if fm==0: a=b=mid; break
-        if (fa<=0 and fm>=0) or (fa>=0 and fm<=0): b=mid
-        else: a=mid
-    mid_local = (a+(b-a)/2).astimezone(LOCAL_TZ)
+    a_dt=approx_dt_local.astimezone(timezone.utc)
+    jd0=jd_from_utc(a_dt); jd=jd0
+    # ±7일 창 안에서 ΔT는 사실상 상수 — 한 번만 계산
+    dt_corr=delta_t_seconds(approx_dt_local.year)/86400.0
+    # 평균 운동(0.98565°/일) 고정 기울기 뉴턴 반복 — 황경 변화율이 0.95~1.02°/일
+    # 범위라 수축률 ~0.035, 대략 시드(±하루)에서 3~4회면 1e-7° 이내로 수렴한다
+    for _ in range(10):
+        delta=wrap180(_solar_lon_tt(jd+dt_corr)-target_deg)
+        if abs(delta)<=1e-7: break
+        jd-=delta/0.98564736
+    mid_local = to_local(a_dt+timedelta(days=jd-jd0))
     return mid_local.replace(microsecond=0)
+JIE12_ROUGH = {'입춘':(2,4),'경칩':(3,6),'청명':(4,5),'입하':(5,6),'망종':(6,6),'소서':(7,7),'입추':(8,8),'백로':(9,8),'한로':(10,8),'입동':(11,7),'대설':(12,7),'소한':(1,6)}
+JIE24_ROUGH = {'입춘':(2,4),'우수':(2,19),'경칩':(3,6),'춘분':(3,21),'청명':(4,5),'곡우':(4,20),'입하':(5,6),'소만':(5,21),'망종':(6,6),'하지':(6,21),'소서':(7,7),'대서':(7,23),'입추':(8,8),'처서':(8,23),'백로':(9,8),'추분':(9,23),'한로':(10,8),'상강':(10,23),'입동':(11,7),'소설':(11,22),'대설':(12,7),'동지':(12,22),'소한':(1,6),'대한':(1,20)}
+MONTH_KR = ['1월','2월','3월','4월','5월','6월','7월','8월','9월','10월','11월','12월']
+
 def approx_guess_local(year):
-    rough={'입춘':(2,4),'경칩':(3,6),'청명':(4,5),'입하':(5,6),'망종':(6,6),'소서':(7,7),'입추':(8,8),'백로':(9,8),'한로':(10,8),'입동':(11,7),'대설':(12,7),'소한':(1,6)}
     out={}
-    for name,(m,d) in rough.items(): out[name]=datetime(year,m,d,9,0,tzinfo=LOCAL_TZ)
+    for name,(m,d) in JIE12_ROUGH.items(): out[name]=datetime(year,m,d,9,0,tzinfo=LOCAL_TZ)
     out['(전년)대설']=datetime(year-1,12,7,9,0,tzinfo=LOCAL_TZ)
     return out
 
 def approx_guess_local_24(year):
-    rough={'입춘':(2,4),'우수':(2,19),'경칩':(3,6),'춘분':(3,21),'청명':(4,5),'곡우':(4,20),'입하':(5,6),'소만':(5,21),'망종':(6,6),'하지':(6,21),'소서':(7,7),'대서':(7,23),'입추':(8,8),'처서':(8,23),'백로':(9,8),'추분':(9,23),'한로':(10,8),'상강':(10,23),'입동':(11,7),'소설':(11,22),'대설':(12,7),'동지':(12,22),'소한':(1,6),'대한':(1,20)}
     out={}
-    for name,(m,d) in rough.items(): out[name]=datetime(year,m,d,9,0,tzinfo=LOCAL_TZ)
+    for name,(m,d) in JIE24_ROUGH.items(): out[name]=datetime(year,m,d,9,0,tzinfo=LOCAL_TZ)
     return out
 
-def compute_jie_times_calc(year):
-    guesses=approx_guess_local(year); terms={}
-    for name in JIE_ORDER: terms[name]=find_longitude_time_local(year,JIE_DEGREES[name],guesses[name])
-    terms['(전년)대설']=find_longitude_time_local(year-1,JIE_DEGREES['대설'],guesses['(전년)대설'])
+@st.cache_resource
+def _jie24_table():
+    """build_jie_table.py가 생성한 절기 테이블 로드. 없으면 None."""
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)),'jie_table.json')
+    try:
+        with open(path,encoding='utf-8') as fp: raw=json.load(fp)
+        # 절기 순서가 현재 코드와 다르면 행 전체가 어긋난다 — 테이블을 버리고 재계산
+        if list(raw['order'])!=list(JIE24_ORDER): return None
+        return raw['start'], raw['epoch_sec']
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=256)
+def _jie_times_cached(year):
+    # 12절기는 24절기의 부분집합 — 별도 탐색 없이 24절기 캐시에서 뽑는다
+    t24=_jie24_times_cached(year)
+    terms={name:t24[name] for name in JIE_ORDER}
+    terms['(전년)대설']=_jie24_times_cached(year-1)['대설']
     return terms
 
-def compute_jie24_times_calc(year):
+def compute_jie_times_calc(year):
+    # 호출부가 경도 보정으로 값을 덮어쓰므로 캐시 원본은 복사해서 준다
+    return dict(_jie_times_cached(year))
+
+def _jie24_times_compute(year):
+    """24절기 시각을 테이블 없이 직접 계산 — build_jie_table.py의 생성 경로."""
     guesses=approx_guess_local_24(year); out={}
     for name in JIE24_ORDER:
         deg=JIE24_DEGREES[name]; approx=guesses[name]; calc_year=approx.year
         out[name]=find_longitude_time_local(calc_year,deg,approx)
     return out
 
+@functools.lru_cache(maxsize=256)
+def _jie24_times_cached(year):
+    tbl=_jie24_table()
+    if tbl:
+        start,rows=tbl; idx=year-start
+        if 0<=idx<len(rows):
+            row=rows[idx]
+            return {name:datetime.fromtimestamp(row[i],LOCAL_TZ) for i,name in enumerate(JIE24_ORDER)}
+    return _jie24_times_compute(year)
+
+def compute_jie24_times_calc(year):
+    return dict(_jie24_times_cached(year))
+
+@functools.lru_cache(maxsize=128)
+def _jie12_solar(year, longitude):
+    """연도별 12절기 시각에 경도 보정까지 적용한 맵. 캐시 원본이므로 읽기 전용."""
+    return {k: to_solar_time(t, longitude) for k, t in _jie_times_cached(year).items()}
+
+@functools.lru_cache(maxsize=128)
+def _jie12_sorted(year, longitude, apply_solar):
+    """12절기(+전년대설)를 시각순으로 정렬한 (이름 튜플, 시각 튜플) — bisect용."""
+    src=_jie12_solar(year, longitude) if apply_solar else _jie_times_cached(year)
+    pairs=sorted(src.items(), key=lambda kv: kv[1])
+    return tuple(n for n,_ in pairs), tuple(t for _,t in pairs)
+
+@functools.lru_cache(maxsize=128)
+def _jie24_solar(year, longitude):
+    """연도별 24절기 시각에 경도 보정까지 적용한 맵. 캐시 원본이므로 읽기 전용."""
+    return {k: to_solar_time(t, longitude) for k, t in _jie24_times_cached(year).items()}
+
 def pillar_day_by_2300(dt_solar):
     return (dt_solar+timedelta(days=1)).date() if (dt_solar.hour,dt_solar.minute)>=(23,0) else dt_solar.date()
 
-def day_ganji_solar(dt_solar, k_anchor=K_ANCHOR):
-    d=pillar_day_by_2300(dt_solar); idx60=(jdn_0h_utc(d.year,d.month,d.day)+k_anchor)%60
-    cidx,jidx=idx60%10,idx60%12; return CHEONGAN[cidx]+JIJI[jidx],cidx,jidx
+def _day_idx60(y, m, d, k_anchor=K_ANCHOR):
+    """일주 60갑자 인덱스 — 순수 정수 연산 커널."""
+    return (jdn_0h_utc(y,m,d)+k_anchor)%60
 
+def day_ganji_solar(dt_solar, k_anchor=K_ANCHOR):
+    # 23시 이후는 다음 날 일주: datetime 재생성 대신 JDN에 +1
+    d=dt_solar.date()
+    idx60=_day_idx60(d.year,d.month,d.day,k_anchor)
+    if (dt_solar.hour,dt_solar.minute)>=(23,0): idx60=(idx60+1)%60
+    return GANJI60[idx60],idx60%10,idx60%12
+
+# 분(0~1439) → 시지 인덱스(23시 기준) 1440바이트 테이블 — 산술 2회를 색인 1회로
+_HOUR_BRANCH = bytes(((m - 23*60) % 1440) // 120 for m in range(1440))
 def hour_branch_idx_2300(dt_solar):
-    mins = dt_solar.hour * 60 + dt_solar.minute
-    off = (mins - (23 * 60)) % 1440
-    return off // 120
+    return _HOUR_BRANCH[dt_solar.hour * 60 + dt_solar.minute]
+# 일간 → 자시 시작 천간(및 인덱스) 평탄화 — 호출마다 5쌍을 훑지 않는다
+SIDU_START_BY_GAN = {g: start for pair,start in SIDU_START.items() for g in pair}
+SIDU_START_IDX = {g: STEM_IDX[start] for g,start in SIDU_START_BY_GAN.items()}
 def sidu_zi_start_gan(day_gan):
-    for pair,start in SIDU_START.items():
-        if day_gan in pair: return start
-    raise ValueError('invalid day gan')
-
-def four_pillars_from_solar(dt_solar, k_anchor=K_ANCHOR):
-    jie12 = compute_jie_times_calc(dt_solar.year)
-
-    # 🔥 절기에도 동일 경도 보정 적용
-    if st.session_state.get('apply_solar', True):
-        lon = st.session_state.get('longitude', DEFAULT_LONGITUDE)
-        for k in jie12:
-            jie12[k] = to_solar_time(jie12[k], lon)
-
-    jie_solar = jie12
+    try: return SIDU_START_BY_GAN[day_gan]
+    except KeyError: raise ValueError('invalid day gan')
+
+def four_pillars_from_solar(dt_solar, k_anchor=K_ANCHOR, longitude=None, apply_solar=None):
+    if apply_solar is None: apply_solar = st.session_state.get('apply_solar', True)
+    if longitude is None: longitude = st.session_state.get('longitude', DEFAULT_LONGITUDE)
+    # 🔥 절기에도 동일 경도 보정 적용 — 보정 맵은 (연도,경도)별로 캐시
+    jie_solar = _jie12_solar(dt_solar.year, longitude) if apply_solar else _jie_times_cached(dt_solar.year)
     ipchun=jie_solar.get("입춘")
     y=dt_solar.year-1 if dt_solar<ipchun else dt_solar.year
-    y_gidx=(y-4)%10; y_jidx=(y-4)%12
-    year_pillar=CHEONGAN[y_gidx]+JIJI[y_jidx]
-    order=list(jie_solar.items()); order.sort(key=lambda x:x[1])
-    last='(전년)대설'
-    for name,t in order:
-        if dt_solar>=t: last=name
-        else: break
-    m_branch=JIE_TO_MONTH_JI[last]; m_bidx=MONTH_JI.index(m_branch)
+    year_pillar,y_gidx,y_jidx=YEAR_GANJI_CYCLE[(y-4)%60]
+    names,times=_jie12_sorted(dt_solar.year, longitude, apply_solar)
+    i=bisect.bisect_right(times,dt_solar)
+    last=names[i-1] if i>0 else '(전년)대설'
+    m_branch=JIE_TO_MONTH_JI[last]; m_bidx=MONTH_JI_IDX[m_branch]
     m_gidx=(month_start_gan_idx(y_gidx)+m_bidx)%10
     month_pillar=CHEONGAN[m_gidx]+m_branch
     day_pillar,d_cidx,d_jidx=day_ganji_solar(dt_solar,k_anchor)
     h_j_idx=hour_branch_idx_2300(dt_solar)
-    zi_start=sidu_zi_start_gan(CHEONGAN[d_cidx])
-    h_c_idx=(CHEONGAN.index(zi_start)+h_j_idx)%10
+    h_c_idx=(SIDU_START_IDX[CHEONGAN[d_cidx]]+h_j_idx)%10
     hour_pillar=CHEONGAN[h_c_idx]+JIJI[h_j_idx]
     return {'year':year_pillar,'month':month_pillar,'day':day_pillar,'hour':hour_pillar,'y_gidx':y_gidx,'m_gidx':m_gidx,'m_bidx':m_bidx,'d_cidx':d_cidx}
 
-def next_prev_jie(dt_solar, jie_solar_dict):
-    items=[(n,t) for n,t in jie_solar_dict.items()]; items.sort(key=lambda x:x[1])
-    prev_t=items[0][1]
-    for _,t in items:
-        if t>dt_solar: return prev_t,t
-        prev_t=t
-    return prev_t,prev_t
+def next_prev_jie(dt_solar, jie_times):
+    """시각순 정렬 튜플(_jie12_sorted)에서 직전/직후 절기 시각을 이분 탐색."""
+    times=jie_times
+    i=bisect.bisect_right(times,dt_solar)
+    if i==0: return times[0],times[0]
+    if i==len(times): return times[-1],times[-1]
+    return times[i-1],times[i]
 
 def round_half_up(x): return int(math.floor(x+0.5))
 
-def dayun_start_age(dt_solar, jie12_solar, forward):
-    prev_t,next_t=next_prev_jie(dt_solar,jie12_solar)
-    delta_days=(next_t-dt_solar).total_seconds()/86400.0 if forward else (dt_solar-prev_t).total_seconds()/86400.0
-    return max(0,round_half_up(delta_days/3.0))
+def dayun_start_age(dt_solar, jie12_times, forward):
+    prev_t,next_t=next_prev_jie(dt_solar,jie12_times)
+    delta_s=(next_t-dt_solar).total_seconds() if forward else (dt_solar-prev_t).total_seconds()
+    # 3일=1세 환산을 초 단위에서 한 번에: round_half_up(delta_s/86400/3)
+    return max(0,int(math.floor(delta_s/259200.0+0.5)))
+
+@dataclass(slots=True, frozen=True)
+class DayunItem:
+    start_age: int
+    g_idx: int
+    b_idx: int
 
 def build_dayun_list(month_gidx, month_bidx, forward, start_age, count=10):
-    dirv=1 if forward else -1; out=[]
-    for i in range(1,count+1):
-        g_i=(month_gidx+dirv*i)%10; b_i=(month_bidx+dirv*i)%12
-        out.append({'start_age':start_age+(i-1)*10,'g_idx':g_i,'b_idx':b_i})
-    return out
+    dirv=1 if forward else -1
+    return [DayunItem(start_age+(i-1)*10,(month_gidx+dirv*i)%10,(month_bidx+dirv*i)%12)
+            for i in range(1,count+1)]
 
 def calc_age_on(dob, now_dt):
     today=now_dt.date() if hasattr(now_dt,"date") else now_dt
     return today.year-dob.year-((today.month,today.day)<(dob.month,dob.day))
 
-def lunar_to_solar(y,m,d,is_leap=False):
-    if not HAS_LUNAR: raise RuntimeError('korean-lunar-calendar 미설치')
-    c=KoreanLunarCalendar(); c.setLunarDate(y,m,d,is_leap); return date(c.solarYear,c.solarMonth,c.solarDay)
+# 1900~2050 음력 윤달 테이블 (0=윤달 없음). korean_lunar_calendar 데이터로 생성한 정적 표.
+_LEAP_MONTHS = (
+    8,0,0,5,0,0,4,0,0,2,0,6,0,0,5,0,0,2,0,7,0,0,5,0,0,4,0,0,2,0,6,0,0,5,0,0,3,0,7,0,0,6,0,0,4,0,0,2,0,7,
+    0,0,5,0,0,3,0,8,0,0,6,0,0,4,0,0,3,0,7,0,0,5,0,0,4,0,8,0,0,6,0,0,4,0,10,0,0,6,0,0,5,0,0,3,0,8,0,0,5,0,
+    0,4,0,0,2,0,7,0,0,5,0,0,3,0,9,0,0,5,0,0,4,0,0,2,0,6,0,0,5,0,0,3,0,11,0,0,6,0,0,5,0,0,2,0,7,0,0,5,0,
+    0,3,
+)
+
+def lunar_leap_month(year):
+    """해당 음력 연도의 윤달 월 (없으면 0, 표 범위 밖이면 None)."""
+    if 1900 <= year <= 2050: return _LEAP_MONTHS[year-1900]
+    return None
 
-@dataclass
+@functools.lru_cache(maxsize=4096)
+def _solar_to_lunar(y, m, d):
+    """양력→음력 (음력월, 음력일, 윤달여부). 변환 불가 시 None."""
+    sx=_sxtwl_backend()
+    if sx:
+        try:
+            day=sx.fromSolar(y,m,d)
+            return day.getLunarMonth(), day.getLunarDay(), bool(day.isLunarLeap())
+        except Exception: pass
+    if not HAS_LUNAR: return None
+    try:
+        c=_lunar_backend()(); c.setSolarDate(y,m,d)
+        return c.lunarMonth, c.lunarDay, bool(c.isIntercalation)
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=512)
+def lunar_to_solar(y,m,d,is_leap=False):
+    sx=_sxtwl_backend()
+    if sx:
+        day=sx.fromLunar(y,m,d,is_leap)
+        return date(day.getSolarYear(),day.getSolarMonth(),day.getSolarDay())
+    if not HAS_LUNAR:
+        res=kasi_lunar_to_solar(y,m,d)
+        if res: return date(*res)
+        raise RuntimeError('korean-lunar-calendar 미설치')
+    c=_lunar_backend()(); c.setLunarDate(y,m,d,is_leap); return date(c.solarYear,c.solarMonth,c.solarDay)
+
+@dataclass(slots=True, frozen=True)
 class Inputs:
     day_stem: str
     month_branch: str
@@ -292,8 +455,9 @@ def decide_geok(inp):
     stems=list(inp.stems_visible); branches=list(inp.branches_visible)
     ds_e=STEM_ELEM[ds]; ds_p=STEM_YY[ds]
     mb_main=BRANCH_MAIN[mb]; mb_e,mb_p=STEM_ELEM[mb_main],STEM_YY[mb_main]
-    visible_set=set(stems); hidden_set=all_hidden_stems(branches); pool=visible_set|hidden_set
-    if mb in {'자','오','묘','유','인','신','사','해'} and ds_e==mb_e:
+    visible_set=set(stems); branch_set=set(branches)
+    grp=MONTH_GRP[mb]
+    if grp!='진술축미' and ds_e==mb_e:
         off_e=ELEM_OVER_ME[ds_e]
         jung_gwan=stem_with_polarity(off_e,'음' if ds_p=='양' else '양')
         pyeon_gwan=stem_with_polarity(off_e,ds_p)
@@ -310,99 +474,128 @@ def decide_geok(inp):
                 why=('편관 '+pyeon_gwan+' 천간 투간' if pyeon_gwan in visible_set else '지지 편관 존재')
                 return '양인격',f'[특수] 월겁+{why}->양인격'
             else: return '월겁격','[특수] 월겁, 편관 없음->월겁격'
-    grp='자오묘유' if mb in {'자','오','묘','유'} else ('인신사해' if mb in {'인','신','사','해'} else '진술축미')
-    if grp=='자오묘유':
-        month_elem=STEM_ELEM[mb_main]
-        same_elem_vis=[s for s in stems if STEM_ELEM.get(s)==month_elem]
-        if same_elem_vis:
-            pick=next((s for s in same_elem_vis if STEM_YY[s]!=ds_p),same_elem_vis[0])
-            six=ten_god_for_stem(ds,pick); return f'{six}격',f'[자오묘유] {pick} 투간->{six}격'
-        six=ten_god_for_stem(ds,mb_main); return f'{six}격',f'[자오묘유] 투간없음->체(본기 {mb_main}){six}격'
-    if grp=='인신사해':
-        rokji=mb_main; month_elem=STEM_ELEM[rokji]
-        base_stems=set(stems_of_element(month_elem))
-        base_vis=[s for s in inp.stems_visible if s in base_stems]
-        if base_vis:
-            pick=base_vis[0]
-            if month_elem==STEM_ELEM[ds]:
-                off_e=ELEM_OVER_ME[STEM_ELEM[ds]]
-                jung_gwan=stem_with_polarity(off_e,'음' if STEM_YY[ds]=='양' else '양')
-                pyeon_gwan=stem_with_polarity(off_e,STEM_YY[ds])
-                if STEM_YY[pick]==STEM_YY[ds]:
-                    if jung_gwan in inp.stems_visible: return '건록격',f'[인신사해] {pick}투간+정관{jung_gwan}->건록격'
-                else:
-                    if pyeon_gwan in inp.stems_visible: return '양인격',f'[인신사해] {pick}투간+편관{pyeon_gwan}->양인격'
-            six=ten_god_for_stem(ds,pick); return f'{six}격',f'[인신사해] 록지{pick}투간->{six}격'
-        tri_elem=MONTH_SAMHAP.get(mb,'')
-        if tri_elem:
-            tri_grp=SAMHAP[tri_elem]; others=set(tri_grp)-{mb}
-            if others.issubset(set(inp.branches_visible)) and is_first_half_by_terms(inp.solar_dt,inp.first_term_dt,inp.mid_term_dt):
-                tri_stems=stems_of_element(tri_elem)
-                tri_vis=[s for s in tri_stems if s in inp.stems_visible]
-                if tri_vis and tri_elem!=STEM_ELEM[ds]:
-                    pick=tri_vis[0]; six=ten_god_for_stem(ds,pick)
-                    return f'중기격({six})',f'[인신사해] 삼합+중기사령+{pick}투간->중기격'
-        if ms: six=ten_god_for_stem(ds,ms); return f'{six}격',f'[인신사해] 록지투간없음->월간{ms}기준{six}격'
-        six=ten_god_for_stem(ds,rokji); return f'{six}격',f'[인신사해] 폴백->본기({rokji}){six}격'
-    if grp=='진술축미':
-        h=BRANCH_HIDDEN.get(mb,[]); mb_main_l=BRANCH_MAIN[mb]; is_front12=(inp.day_from_jieqi<=11)
-        tri_elem=MONTH_SAMHAP.get(mb,'')
-        if tri_elem:
-            tri_grp=SAMHAP[tri_elem]; others=set(tri_grp)-{mb}; partners=others&set(branches)
-            if partners:
-                if tri_elem==STEM_ELEM[ds]:
-                    six=ten_god_for_stem(ds,mb_main_l); return f'{six}격',f'[진술축미] 반합{mb}+동일오행->체(본기){six}격'
-                tri_stems=stems_of_element(tri_elem); tri_vis=[s for s in tri_stems if s in visible_set]
-                mid_qi=h[1] if len(h)>=2 else (h[-1] if h else mb_main_l); mid_is_tri=(STEM_ELEM.get(mid_qi)==tri_elem)
-                pick=tri_vis[0] if tri_vis else (mid_qi if mid_is_tri else stem_with_polarity(tri_elem,'음' if STEM_YY[ds]=='양' else '양'))
-                six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 반합+{pick}기준{six}격'
-        if is_front12:
-            yeogi=h[0] if h else mb_main_l; y_elem=STEM_ELEM[yeogi]
-            same_vis=[s for s in stems if STEM_ELEM.get(s)==y_elem]
-            opp=[s for s in same_vis if STEM_YY[s]!=ds_p]
-            pick=opp[0] if opp else (same_vis[0] if same_vis else yeogi)
-            six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 절입후12일이내->여기사령({pick}){six}격'
-        else:
-            earth_vis=[s for s in ('무','기') if s in visible_set]
-            opp=[s for s in earth_vis if STEM_YY[s]!=ds_p]
-            pick=opp[0] if opp else (earth_vis[0] if earth_vis else mb_main_l)
-            six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 절입13일이후->주왕토({pick}){six}격'
-    six=ten_god_for_stem(ds,BRANCH_MAIN[mb]); return f'{six}격',f'[폴백]->체(본기{BRANCH_MAIN[mb]}){six}격'
-
-def calc_wolun_accurate(year):
+    return _GEOK_BY_GRP[grp](inp,ds,mb,ms,stems,ds_p,mb_main,visible_set,branch_set)
+
+def _geok_jaomyoyu(inp,ds,mb,ms,stems,ds_p,mb_main,visible_set,branch_set):
+    month_elem=STEM_ELEM[mb_main]
+    same_elem_vis=[s for s in stems if STEM_ELEM.get(s)==month_elem]
+    if same_elem_vis:
+        pick=next((s for s in same_elem_vis if STEM_YY[s]!=ds_p),same_elem_vis[0])
+        six=ten_god_for_stem(ds,pick); return f'{six}격',f'[자오묘유] {pick} 투간->{six}격'
+    six=ten_god_for_stem(ds,mb_main); return f'{six}격',f'[자오묘유] 투간없음->체(본기 {mb_main}){six}격'
+
+def _geok_inshinsahae(inp,ds,mb,ms,stems,ds_p,mb_main,visible_set,branch_set):
+    rokji=mb_main; month_elem=STEM_ELEM[rokji]
+    base_stems=set(stems_of_element(month_elem))
+    base_vis=[s for s in stems if s in base_stems]
+    if base_vis:
+        pick=base_vis[0]
+        if month_elem==STEM_ELEM[ds]:
+            off_e=ELEM_OVER_ME[STEM_ELEM[ds]]
+            jung_gwan=stem_with_polarity(off_e,'음' if STEM_YY[ds]=='양' else '양')
+            pyeon_gwan=stem_with_polarity(off_e,STEM_YY[ds])
+            if STEM_YY[pick]==STEM_YY[ds]:
+                if jung_gwan in visible_set: return '건록격',f'[인신사해] {pick}투간+정관{jung_gwan}->건록격'
+            else:
+                if pyeon_gwan in visible_set: return '양인격',f'[인신사해] {pick}투간+편관{pyeon_gwan}->양인격'
+        six=ten_god_for_stem(ds,pick); return f'{six}격',f'[인신사해] 록지{pick}투간->{six}격'
+    tri_elem=MONTH_SAMHAP[mb]
+    if tri_elem:
+        others=SAMHAP_OTHERS[mb]
+        if others.issubset(branch_set) and is_first_half_by_terms(inp.solar_dt,inp.first_term_dt,inp.mid_term_dt):
+            tri_stems=stems_of_element(tri_elem)
+            tri_vis=[s for s in tri_stems if s in visible_set]
+            if tri_vis and tri_elem!=STEM_ELEM[ds]:
+                pick=tri_vis[0]; six=ten_god_for_stem(ds,pick)
+                return f'중기격({six})',f'[인신사해] 삼합+중기사령+{pick}투간->중기격'
+    if ms: six=ten_god_for_stem(ds,ms); return f'{six}격',f'[인신사해] 록지투간없음->월간{ms}기준{six}격'
+    six=ten_god_for_stem(ds,rokji); return f'{six}격',f'[인신사해] 폴백->본기({rokji}){six}격'
+
+def _geok_jinsulchukmi(inp,ds,mb,ms,stems,ds_p,mb_main,visible_set,branch_set):
+    h=BRANCH_HIDDEN.get(mb,[]); mb_main_l=BRANCH_MAIN[mb]; is_front12=(inp.day_from_jieqi<=11)
+    tri_elem=MONTH_SAMHAP[mb]
+    if tri_elem:
+        others=SAMHAP_OTHERS[mb]; partners=others&branch_set
+        if partners:
+            if tri_elem==STEM_ELEM[ds]:
+                six=ten_god_for_stem(ds,mb_main_l); return f'{six}격',f'[진술축미] 반합{mb}+동일오행->체(본기){six}격'
+            tri_stems=stems_of_element(tri_elem); tri_vis=[s for s in tri_stems if s in visible_set]
+            mid_qi=h[1] if len(h)>=2 else (h[-1] if h else mb_main_l); mid_is_tri=(STEM_ELEM.get(mid_qi)==tri_elem)
+            pick=tri_vis[0] if tri_vis else (mid_qi if mid_is_tri else stem_with_polarity(tri_elem,'음' if STEM_YY[ds]=='양' else '양'))
+            six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 반합+{pick}기준{six}격'
+    if is_front12:
+        yeogi=h[0] if h else mb_main_l; y_elem=STEM_ELEM[yeogi]
+        same_vis=[s for s in stems if STEM_ELEM.get(s)==y_elem]
+        opp=[s for s in same_vis if STEM_YY[s]!=ds_p]
+        pick=opp[0] if opp else (same_vis[0] if same_vis else yeogi)
+        six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 절입후12일이내->여기사령({pick}){six}격'
+    else:
+        earth_vis=[s for s in ('무','기') if s in visible_set]
+        opp=[s for s in earth_vis if STEM_YY[s]!=ds_p]
+        pick=opp[0] if opp else (earth_vis[0] if earth_vis else mb_main_l)
+        six=ten_god_for_stem(ds,pick); return f'{six}격',f'[진술축미] 절입13일이후->주왕토({pick}){six}격'
+
+# 월지 그룹별 판정 분기는 상수 — dict 디스패치로 한 번에 도달
+_GEOK_BY_GRP = {'자오묘유':_geok_jaomyoyu,'인신사해':_geok_inshinsahae,'진술축미':_geok_jinsulchukmi}
+
+@dataclass(slots=True, frozen=True)
+class WolunItem:
+    month: int
+    gan: str
+    ji: str
+    t1: datetime
+    t2: datetime
+    t_end: datetime
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def calc_wolun_accurate(year, longitude=None, apply_solar=None):
     jie12_prev=compute_jie_times_calc(year-1); jie12_this=compute_jie_times_calc(year); jie12_next=compute_jie_times_calc(year+1)
-    jie24_prev=compute_jie24_times_calc(year-1); jie24_this=compute_jie24_times_calc(year); jie24_next=compute_jie24_times_calc(year+1)
-    collected=[]
-    for src_jie in [jie12_prev,jie12_this,jie12_next]:
-        for jname in JIE_ORDER:
-            if jname in src_jie:
-                t = src_jie[jname]
-                if t.year==year: collected.append((t,jname))
-    collected.sort(key=lambda x:x[0])
+    jie24_this=compute_jie24_times_calc(year); jie24_next=compute_jie24_times_calc(year+1)
+    # 연도 맵 안에서 달력 순서는 소한(1월)→…→대설(12월) — 정렬된 세 구간을 merge로 합친다
+    cal_order=('소한',)+tuple(JIE_ORDER[:-1])
+    runs=([(src[jname],jname) for jname in cal_order if src[jname].year==year]
+          for src in (jie12_prev,jie12_this,jie12_next))
+    collected=list(heapq.merge(*runs))
     items=[]
     for t,jname in collected:
-        t_calc = t + timedelta(seconds=1); fp=four_pillars_from_solar(t_calc)
+        t_calc = t + timedelta(seconds=1); fp=four_pillars_from_solar(t_calc, longitude=longitude, apply_solar=apply_solar)
         m_gan=fp['month'][0]; m_ji=fp['month'][1]
-        t2_name=MONTH_TO_2TERMS[m_ji][1]; t2=None
-        for src in [jie24_this,jie24_prev,jie24_next]:
-            if t2_name in src:
-                cand = src[t2_name]
-                if cand>t: t2=cand; break
-        jie_idx=JIE_ORDER.index(jname); next_jname=JIE_ORDER[(jie_idx+1)%12]; t_end=None
-        for src in [jie12_this,jie12_next,jie12_prev]:
-            if next_jname in src:
-                nt = src[next_jname]
-                if nt>t: t_end=nt; break
-        items.append({'month':t.month,'gan':m_gan,'ji':m_ji,'t1':t,'t2':t2,'t_end':t_end})
+        # 계산 맵은 항상 전체 절기를 담으므로 소스 3개를 훑지 않는다:
+        # 올해 시각이 t 이전이면 같은 이름의 다음 해 시각이 정답이다
+        t2_name=MONTH_TO_2TERMS[m_ji][1]
+        t2=jie24_this[t2_name]
+        if t2<=t: t2=jie24_next[t2_name]
+        next_jname=JIE_ORDER[(JIE_ORDER_IDX[jname]+1)%12]
+        t_end=jie12_this[next_jname]
+        if t_end<=t: t_end=jie12_next[next_jname]
+        items.append(WolunItem(t.month,m_gan,m_ji,t,t2,t_end))
     return items
 
+@functools.lru_cache(maxsize=16)
+def _six_pair60(day_stem):
+    # 일간별 60갑자 육친 문자열 — 일진 스트립이 날마다 포맷하지 않게 미리 만든다
+    return tuple(f'{six_for_stem(day_stem,g)}/{six_for_branch(day_stem,j)}' for g,j in GANJI_PAIR60)
+
+@dataclass(slots=True, frozen=True)
+class IlunItem:
+    date: date
+    gan: str
+    ji: str
+    six: str
+
 def calc_ilun_strip(start_dt, end_dt, day_stem, k_anchor=K_ANCHOR):
-    items=[]; cur=start_dt.replace(hour=12,minute=0,second=0,microsecond=0)
+    cur=start_dt.replace(hour=12,minute=0,second=0,microsecond=0)
     if cur<start_dt: cur=cur+timedelta(days=1)
-    while cur<end_dt:
-        dj,dc,djidx=day_ganji_solar(cur,k_anchor); g,j=dj[0],dj[1]
-        items.append({'date':cur.date(),'gan':g,'ji':j,'six':f'{six_for_stem(day_stem,g)}/{six_for_branch(day_stem,j)}'})
-        cur=cur+timedelta(days=1)
+    if cur>=end_dt: return []
+    # 연속된 날은 일주 인덱스가 1씩 증가 — JDN은 첫날 한 번만 계산
+    base=_day_idx60(cur.year,cur.month,cur.day,k_anchor)
+    n=math.ceil((end_dt-cur)/timedelta(days=1))
+    six60=_six_pair60(day_stem); d=cur.date(); one=timedelta(days=1)
+    items=[]
+    for k in range(n):
+        idx=(base+k)%60; g,j=GANJI_PAIR60[idx]
+        items.append(IlunItem(d,g,j,six60[idx]))
+        d=d+one
     return items
 
 # ── 사령(司令) 데이터 ──
@@ -457,23 +650,23 @@ def get_dangryeong(month_branch, dt_solar=None, jie24_solar=None):
             return item
     return None
 
-def get_nearby_jeolip(dt_solar):
-    year = dt_solar.year
+@st.cache_resource
+def _jeolip_sorted_around(year):
+    """year-1~year+1의 24절기를 시각순 정렬해 캐시 (항목, 시각 병렬 튜플)."""
     all_jeolip = []
     for y in [year-1, year, year+1]:
         jie24 = compute_jie24_times_calc(y)
         for name in JIE24_ORDER:
             if name in jie24:
-                t = jie24[name]
-                all_jeolip.append((name, t))
+                all_jeolip.append((name, jie24[name]))
     all_jeolip.sort(key=lambda x: x[1])
-    prev_item = None
-    next_item = None
-    for item in all_jeolip:
-        if item[1] <= dt_solar:
-            prev_item = item
-        elif next_item is None and item[1] > dt_solar:
-            next_item = item
+    return tuple(all_jeolip), tuple(t for _, t in all_jeolip)
+
+def get_nearby_jeolip(dt_solar):
+    all_jeolip, times = _jeolip_sorted_around(dt_solar.year)
+    i = bisect.bisect_right(times, dt_solar)
+    prev_item = all_jeolip[i-1] if i > 0 else None
+    next_item = all_jeolip[i] if i < len(all_jeolip) else None
     return prev_item, next_item
 
 # ── 격(格) 카드 데이터 ──
@@ -545,9 +738,13 @@ div[data-testid='stHorizontalBlock']{gap:4px!important;}
 div[data-testid='column']{padding:0 2px!important;}
 </style>
 """
+# CSS + 뷰포트 메타(모바일 핀치줌 허용) + 헤더를 한 번의 markdown으로 — 리런마다 3개 노드 대신 1개
+_HEADER_HTML = (MOBILE_CSS
+    + '<meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=yes, maximum-scale=5.0">'
+    + '<div class="page-hdr">만 세 력</div>')
 
-def hanja_gan(g): return HANJA_GAN[CHEONGAN.index(g)]
-def hanja_ji(j): return HANJA_JI[JIJI.index(j)]
+def hanja_gan(g): return HANJA_GAN[STEM_IDX[g]]
+def hanja_ji(j): return HANJA_JI[JI_IDX[j]]
 
 def gan_card_html(g, size=52, fsize=26):
     bg=GAN_BG.get(g,"#888"); fg=gan_fg(g); hj=hanja_gan(g)
@@ -557,24 +754,28 @@ def ji_card_html(j, size=52, fsize=26):
     bg=BR_BG.get(j,"#888"); fg=br_fg(j); hj=hanja_ji(j)
     return f'<div style="width:{size}px;height:{size}px;border-radius:8px;background:{bg};color:{fg};display:flex;align-items:center;justify-content:center;font-size:{fsize}px;font-weight:900;border:1px solid rgba(0,0,0,.15);">{hj}</div>'
 
+# 기본 크기 카드 HTML은 간지별로 고정 — 임포트 시 한 번만 포맷
+GAN_CARD_HTML = {g: gan_card_html(g) for g in CHEONGAN}
+JI_CARD_HTML = {j: ji_card_html(j) for j in JIJI}
+
 def render_saju_table(fp, ilgan):
     yg,yj=fp['year'][0],fp['year'][1]; mg,mj=fp['month'][0],fp['month'][1]
     dg,dj=fp['day'][0],fp['day'][1]; sg,sj=fp['hour'][0],fp['hour'][1]
     cols=[(sg,sj,'시주'),(dg,dj,'일주'),(mg,mj,'월주'),(yg,yj,'년주')]
     ss_g=[six_for_stem(ilgan,sg),'일간',six_for_stem(ilgan,mg),six_for_stem(ilgan,yg)]
     ss_j=[six_for_branch(ilgan,sj),six_for_branch(ilgan,dj),six_for_branch(ilgan,mj),six_for_branch(ilgan,yj)]
-    html='<div class="saju-wrap"><table class="saju-table"><thead><tr>'
-    for g,j,lbl in cols: html+=f'<th>{lbl}</th>'
-    html+='</tr><tr class="lb">'
-    for i,(g,j,_) in enumerate(cols): html+=f'<td>{ss_g[i]}</td>'
-    html+='</tr></thead><tbody><tr>'
-    for g,j,_ in cols: html+=f'<td class="gcell">{gan_card_html(g)}</td>'
-    html+='</tr><tr>'
-    for g,j,_ in cols: html+=f'<td class="jcell">{ji_card_html(j)}</td>'
-    html+='</tr><tr class="lb">'
-    for i,(_,j,__) in enumerate(cols): html+=f'<td>{ss_j[i]}</td>'
-    html+='</tr></tbody></table></div>'
-    return html
+    parts=['<div class="saju-wrap"><table class="saju-table"><thead><tr>']
+    parts+=[f'<th>{lbl}</th>' for _,_,lbl in cols]
+    parts.append('</tr><tr class="lb">')
+    parts+=[f'<td>{s}</td>' for s in ss_g]
+    parts.append('</tr></thead><tbody><tr>')
+    parts+=[f'<td class="gcell">{GAN_CARD_HTML[g]}</td>' for g,_,_ in cols]
+    parts.append('</tr><tr>')
+    parts+=[f'<td class="jcell">{JI_CARD_HTML[j]}</td>' for _,j,_ in cols]
+    parts.append('</tr><tr class="lb">')
+    parts+=[f'<td>{s}</td>' for s in ss_j]
+    parts.append('</tr></tbody></table></div>')
+    return ''.join(parts)
 
 def render_geok_card_html(card, show_detail=False):
     if not card: return ''
@@ -605,38 +806,102 @@ def render_geok_card_html(card, show_detail=False):
     )
     return detail
 
+# 30px 간지 칩 HTML도 간지별로 고정 — 대운 카드가 매 렌더마다 다시 포맷하지 않는다
+GAN_CHIP30 = {g: f'<div style="width:30px;height:30px;border-radius:5px;background:{GAN_BG[g]};color:{gan_fg(g)};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;margin-bottom:1px">{hanja_gan(g)}</div>' for g in CHEONGAN}
+JI_CHIP30 = {j: f'<div style="width:30px;height:30px;border-radius:5px;background:{BR_BG[j]};color:{br_fg(j)};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;margin-bottom:1px">{hanja_ji(j)}</div>' for j in JIJI}
+_DAEUN_CARD_TMPL = (
+    '<div style="text-align:center;font-size:10px;color:#6b5a3e;margin-bottom:1px">{age}세</div>'
+    '<div style="display:flex;flex-direction:column;align-items:center;border:{bdr};border-radius:10px;background:{bg_card};padding:3px 2px;">'
+    '<div style="font-size:9px;color:#5a3e0a;margin-bottom:1px;white-space:nowrap">{six_g}</div>'
+    '{chip_g}{chip_j}'
+    '<div style="font-size:9px;color:#5a3e0a;white-space:nowrap">{six_j}</div>'
+    '</div>'
+)
+
+# 카드 활성/비활성 스타일 쌍 — bool 인덱싱으로 분기 없이 선택
+_CARD_BDR = ('1px solid #c8b87a', '2px solid #8b6914')
+_CARD_BG = ('#e8e4d8', '#d4c48a')
+
+_SEUN_CARD_TMPL = (
+    '<div style="display:flex;flex-direction:column;align-items:center;min-width:38px;border:{bdr};border-radius:8px;background:{bg_card};padding:3px 2px 2px;">'
+    '<div style="font-size:9px;color:#6b5a3e;margin-bottom:1px;white-space:nowrap">{sy}</div>'
+    '<div style="font-size:9px;color:#5a3e0a;margin-bottom:1px;white-space:nowrap">{six_g}</div>'
+    '<div style="width:30px;height:30px;border-radius:5px;background:{bg_g};color:{tc_g};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;">{hj_sg}</div>'
+    '<div style="width:30px;height:30px;border-radius:5px;background:{bg_j};color:{tc_j};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;margin-top:1px;">{hj_sj}</div>'
+    '<div style="font-size:9px;color:#5a3e0a;margin-top:1px;white-space:nowrap">{six_j}</div>'
+    '</div>'
+)
+
 def render_daeun_card(age, g, j, ilgan, active, btn_key, dy_year=0):
-    bg_g=GAN_BG.get(g,"#888"); tc_g=gan_fg(g)
-    bg_j=BR_BG.get(j,"#888"); tc_j=br_fg(j)
-    hj_g=hanja_gan(g); hj_j=hanja_ji(j)
-    bdr='2px solid #8b6914' if active else '1px solid #c8b87a'
-    bg_card='#d4c48a' if active else '#e8e4d8'
-    six_g=six_for_stem(ilgan,g); six_j=six_for_branch(ilgan,j)
+    bdr=_CARD_BDR[active]; bg_card=_CARD_BG[active]
     st.markdown(
-        f'<div style="text-align:center;font-size:10px;color:#6b5a3e;margin-bottom:1px">{age}세</div>'
-        f'<div style="display:flex;flex-direction:column;align-items:center;border:{bdr};border-radius:10px;background:{bg_card};padding:3px 2px;">'
-        f'<div style="font-size:9px;color:#5a3e0a;margin-bottom:1px;white-space:nowrap">{six_g}</div>'
-        f'<div style="width:30px;height:30px;border-radius:5px;background:{bg_g};color:{tc_g};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;margin-bottom:1px">{hj_g}</div>'
-        f'<div style="width:30px;height:30px;border-radius:5px;background:{bg_j};color:{tc_j};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;margin-bottom:1px">{hj_j}</div>'
-        f'<div style="font-size:9px;color:#5a3e0a;white-space:nowrap">{six_j}</div>'
-        '</div>',
+        _DAEUN_CARD_TMPL.format(age=age, bdr=bdr, bg_card=bg_card,
+                                six_g=six_for_stem(ilgan,g), six_j=six_for_branch(ilgan,j),
+                                chip_g=GAN_CHIP30[g], chip_j=JI_CHIP30[j]),
         unsafe_allow_html=True
     )
     return st.button(f'{dy_year}', key=btn_key, use_container_width=True)
 
+# 하단 네비/푸터는 전부 상수 — 임포트 시 한 번만 조립해 리런마다 재포맷하지 않는다
+_GPT_URL='https://chatgpt.com/g/g-68d90b2d8f448191b87fb7511fa8f80a-rua-myeongrisajusangdamsa'
+_GPT_BTN=f'<a href="{_GPT_URL}" target="_blank" class="bottom-btn-ai">🤖 AI 챗봇 무료상담</a>'
+_YT_FOOTER=('<div style="text-align:center;margin-top:6px;font-size:11px;">'
+            '<a href="https://www.youtube.com/@psycologysalon" target="_blank" style="color:#8b6914;text-decoration:none;">🎥 2025 상담학박사 루아코치 유튜브</a>'
+            '</div>')
+_BOTTOM_SAJU=f'<div class="bottom-btns">{_GPT_BTN}</div>{_YT_FOOTER}'
+_BOTTOM_WOLUN=('<div class="bottom-btns">'
+               '<a href="https://open.kakao.com/o/sWJUYGDh" target="_blank" class="bottom-btn-saju" style="text-align:center;padding:12px 6px;text-decoration:none;">💬 이박사 오픈카카오톡</a>'
+               f'{_GPT_BTN}</div>{_YT_FOOTER}')
+_BOTTOM_ILUN=('<div class="bottom-btns">'
+              '<div class="bottom-btn-saju" style="text-align:center;padding:12px 6px;">📊 내 사주 해석 보기</div>'
+              f'{_GPT_BTN}</div>')
+
 def main():
     st.set_page_config(page_title='이박사 만세력', layout='centered', page_icon='🔮', initial_sidebar_state='collapsed')
-    st.markdown(MOBILE_CSS, unsafe_allow_html=True)
-    # 모바일 핀치줌 허용
-    st.markdown('<meta name="viewport" content="width=device-width, initial-scale=1.0, user-scalable=yes, maximum-scale=5.0">', unsafe_allow_html=True)
-    st.markdown('<div class="page-hdr">만 세 력</div>', unsafe_allow_html=True)
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     for key,val in [('page','input'),('saju_data',None),('sel_daeun',0),('sel_seun',0),('sel_wolun',0),('show_geok_detail',False),('show_saju_interp',False)]:
-        if key not in st.session_state: st.session_state[key]=val
+        st.session_state.setdefault(key, val)
     if st.session_state.page=='input': page_input()
     elif st.session_state.page=='saju': page_saju()
     elif st.session_state.page=='wolun': page_wolun()
     elif st.session_state.page=='ilun': page_ilun()
 
+@st.cache_data(show_spinner=False, max_entries=512)
+def compute_saju(dt_solar, base_date, gender, longitude, apply_solar):
+    """출생 정보 → 사주 전체 계산 결과(평범한 dict). 동일 입력 재계산은 캐시를 탄다."""
+    fp=four_pillars_from_solar(dt_solar, longitude=longitude, apply_solar=apply_solar)
+    ilgan=fp['day'][0]
+    # 대운수 계산은 보정 전 절기 시각 기준 — 캐시된 정렬 튜플을 그대로 쓴다
+    _,jie12_times=_jie12_sorted(dt_solar.year, longitude, False)
+
+    year_gan=fp['year'][0]
+    forward=(is_yang_stem(year_gan)==(gender=='남'))
+    start_age=dayun_start_age(dt_solar,jie12_times,forward)
+    daeun=build_dayun_list(fp['m_gidx'],fp['m_bidx'],forward,start_age)
+    seun_start=base_date.year
+    seun=[(sy,)+GANJI_PAIR60[(sy-4)%60] for sy in range(seun_start,seun_start+100)]
+    jie24_solar=_jie24_solar(dt_solar.year, longitude) if apply_solar else _jie24_times_cached(dt_solar.year)
+    pair=MONTH_TO_2TERMS[fp['month'][1]]
+    # 절기명은 연도 맵 안에서 유일 — 이름 필터+정렬 대신 dict 조회 한 번이면 된다
+    t1=jie24_solar.get(pair[0],dt_solar); t2=jie24_solar.get(pair[1],dt_solar)
+    day_from_jieqi=(dt_solar-t1).days  # timedelta.days는 내림 — total_seconds()//86400과 동일
+    day_from_jieqi=max(0,min(29,day_from_jieqi))
+    geok,why=decide_geok(Inputs(
+        day_stem=fp['day'][0],month_branch=fp['month'][1],month_stem=fp['month'][0],
+        stems_visible=[fp['year'][0],fp['month'][0],fp['day'][0],fp['hour'][0]],
+        branches_visible=[fp['year'][1],fp['month'][1],fp['day'][1],fp['hour'][1]],
+        solar_dt=dt_solar,first_term_dt=t1,mid_term_dt=t2,day_from_jieqi=day_from_jieqi
+    ))
+    return {
+        'dt_solar':dt_solar,'gender':gender,'fp':fp,'daeun':daeun,
+        'seun':seun,'seun_start':seun_start,'geok':geok,'why':why,
+        't1':t1,'t2':t2,'day_from_jieqi':day_from_jieqi,
+        'ilgan':ilgan,'start_age':start_age,'forward':forward,
+        'jie24_solar':jie24_solar,
+        'longitude': longitude,
+        'apply_solar': apply_solar,
+    }
+
 def page_input():
     now=datetime.now(LOCAL_TZ)
     st.markdown('<div class="sec-title">📅 출생 정보 입력</div>', unsafe_allow_html=True)
@@ -653,69 +918,28 @@ def page_input():
     is_leap = (cal_type == '음력윤달')
     if st.button('🔮 사주 보기'):
         try:
-            bs=re.sub(r'\D','',birth_str); bt=re.sub(r'\D','',birth_time)
+            bs=_NON_DIGIT_RE.sub('',birth_str); bt=_NON_DIGIT_RE.sub('',birth_time)
             y=int(bs[:4]); m=int(bs[4:6]); d=int(bs[6:8])
             hh=int(bt[:2]) if len(bt)>=2 else 0
             mm_t=int(bt[2:4]) if len(bt)==4 else 0
             base_date=date(y,m,d)
-            if cal_type in ('음력','음력윤달') and HAS_LUNAR: base_date=lunar_to_solar(y,m,d,is_leap)
+            if is_leap and lunar_leap_month(y) not in (None, m):
+                raise ValueError(f'{y}년 음력에는 윤{m}월이 없습니다')
+            if cal_type in ('음력','음력윤달'): base_date=lunar_to_solar(y,m,d,is_leap)
             dt_local=datetime.combine(base_date,time(hh,mm_t)).replace(tzinfo=LOCAL_TZ)
             if apply_solar:
                 dt_solar = to_solar_time(dt_local, longitude)
             else:
                 dt_solar = dt_local
 
-            fp=four_pillars_from_solar(dt_solar)
-            ilgan=fp['day'][0]
-            jie12 = compute_jie_times_calc(dt_solar.year)
-        
-            year_gan=fp['year'][0]
-            forward=(is_yang_stem(year_gan)==(gender=='남'))
-            start_age=dayun_start_age(dt_solar,jie12,forward)
-            daeun=build_dayun_list(fp['m_gidx'],fp['m_bidx'],forward,start_age)
-            seun_start=base_date.year
-            seun=[]
-            for i in range(100):
-                sy=seun_start+i; off=(sy-4)%60
-                seun.append((sy,CHEONGAN[off%10],JIJI[off%12]))
-            jie24 = compute_jie24_times_calc(dt_solar.year)
-
-            if apply_solar:
-                for k in jie24:
-                    jie24[k] = to_solar_time(jie24[k], longitude)
-
-            jie24_solar = jie24
-            pair=MONTH_TO_2TERMS[fp['month'][1]]
-            def nearest_t(name):
-                cands=[(abs((t-dt_solar).total_seconds()),t) for n,t in jie24_solar.items() if n==name]
-                if not cands: return dt_solar
-                cands.sort(); return cands[0][1]
-            t1=nearest_t(pair[0]); t2=nearest_t(pair[1])
-            day_from_jieqi=int((dt_solar-t1).total_seconds()//86400)
-            day_from_jieqi=max(0,min(29,day_from_jieqi))
-            geok,why=decide_geok(Inputs(
-                day_stem=fp['day'][0],month_branch=fp['month'][1],month_stem=fp['month'][0],
-                stems_visible=[fp['year'][0],fp['month'][0],fp['day'][0],fp['hour'][0]],
-                branches_visible=[fp['year'][1],fp['month'][1],fp['day'][1],fp['hour'][1]],
-                solar_dt=dt_solar,first_term_dt=t1,mid_term_dt=t2,day_from_jieqi=day_from_jieqi
-            ))
+            saju=compute_saju(dt_solar, base_date, gender, longitude, apply_solar)
+            daeun=saju['daeun']
             age_now=calc_age_on(base_date,now)
-            sel_du=0
-            for idx,item in enumerate(daeun):
-                if item['start_age']<=age_now: sel_du=idx
+            sel_du=max(0, bisect.bisect_right([item.start_age for item in daeun], age_now)-1)
             sel_su=min(age_now, 99)
             st.session_state['_birth_str']=birth_str
             st.session_state['_birth_time']=birth_time
-            st.session_state.saju_data={
-                'birth':(base_date.year,base_date.month,base_date.day,hh,mm_t),
-                'dt_solar':dt_solar,'gender':gender,'fp':fp,'daeun':daeun,
-                'seun':seun,'seun_start':seun_start,'geok':geok,'why':why,
-                't1':t1,'t2':t2,'day_from_jieqi':day_from_jieqi,
-                'ilgan':ilgan,'start_age':start_age,'forward':forward,
-                'jie24_solar':jie24_solar,
-                'longitude': longitude,
-                'apply_solar': apply_solar,
-            }
+            st.session_state.saju_data=dict(saju, birth=(base_date.year,base_date.month,base_date.day,hh,mm_t))
             st.session_state.sel_daeun=sel_du
             st.session_state.sel_seun=sel_su
             st.session_state.sel_wolun=now.month-1
@@ -724,6 +948,29 @@ def page_input():
             st.rerun()
         except Exception as e: st.error(f'입력 오류: {e}')
 
+@functools.lru_cache(maxsize=4096)
+def _seun_card(sy, sg, sj, ilgan, active):
+    """세운 카드 HTML — (연도,간지,일간,선택) 조합이 반복되므로 결과 문자열을 캐시."""
+    bg_g,tc_g=GAN_CELL[sg]; bg_j,tc_j=BR_CELL[sj]
+    bdr=_CARD_BDR[active]; bg_card=_CARD_BG[active]
+    return _SEUN_CARD_TMPL.format(
+        sy=sy, bdr=bdr, bg_card=bg_card,
+        six_g=six_for_stem(ilgan,sg), six_j=six_for_branch(ilgan,sj),
+        bg_g=bg_g, tc_g=tc_g, hj_sg=hanja_gan(sg),
+        bg_j=bg_j, tc_j=tc_j, hj_sj=hanja_ji(sj),
+    )
+
+@st.cache_data(ttl=120, show_spinner=False)
+def _today_banner_html(minute_key, longitude, apply_solar):
+    """현재 일진 배너 — 분 단위 키로 캐시해 리런마다 사주를 다시 뽑지 않는다."""
+    now=datetime.now(LOCAL_TZ)
+    now_solar=to_solar_time(now, longitude) if apply_solar else now
+    tfp=four_pillars_from_solar(now_solar, longitude=longitude, apply_solar=apply_solar)
+    hj_y=hanja_gan(tfp['year'][0])+hanja_ji(tfp['year'][1])
+    hj_m=hanja_gan(tfp['month'][0])+hanja_ji(tfp['month'][1])
+    hj_d=hanja_gan(tfp['day'][0])+hanja_ji(tfp['day'][1])
+    return f'<div class="today-banner">오늘 {now.strftime("%Y.%m.%d")} · {hj_y}년 {hj_m}월 {hj_d}일</div>'
+
 def page_saju():
     data=st.session_state.saju_data
     if not data or 'fp' not in data: st.session_state.page='input'; st.rerun(); return
@@ -740,30 +987,14 @@ def page_saju():
     longitude = data.get('longitude', DEFAULT_LONGITUDE)
     apply_solar = data.get('apply_solar', True)
 
-    if apply_solar:
-        now_solar = to_solar_time(now, longitude)
-    else:
-        now_solar = now
-    today_fp=four_pillars_from_solar(now_solar)
-    yg,yj=today_fp['year'][0],today_fp['year'][1]
-    dg,dj=today_fp['day'][0],today_fp['day'][1]
-    mg,mj=today_fp['month'][0],today_fp['month'][1]
-    hj_yg=hanja_gan(yg); hj_yj=hanja_ji(yj)
-    hj_mg=hanja_gan(mg); hj_mj=hanja_ji(mj)
-    hj_dg=hanja_gan(dg); hj_dj=hanja_ji(dj)
-    st.markdown(f'<div class="today-banner">오늘 {now.strftime("%Y.%m.%d")} · {hj_yg}{hj_yj}년 {hj_mg}{hj_mj}월 {hj_dg}{hj_dj}일</div>', unsafe_allow_html=True)
     b=data['birth']; birth_display=f'{b[0]}년 {b[1]}월 {b[2]}일 {b[3]:02d}:{b[4]:02d}'
-    st.markdown(f'<div style="text-align:center;font-size:11px;color:#8b6914;margin:-4px 0 6px;padding:2px 0;">입력 생년월일시 · 서기 {birth_display}</div>', unsafe_allow_html=True)
-
-    st.markdown(render_saju_table(fp,ilgan), unsafe_allow_html=True)
-    longitude = data.get('longitude', DEFAULT_LONGITUDE)
-    apply_solar = data.get('apply_solar', True)
-
     calc_info = f"🔎 기준: 경도 {longitude:.2f}° / "
     calc_info += "진태양시 보정 적용" if apply_solar else "표준시 기준 계산"
-
     st.markdown(
-        f'<div style="text-align:center;font-size:10px;color:#6b5a3e;margin:-6px 0 4px;">{calc_info}</div>',
+        _today_banner_html(now.strftime('%Y%m%d%H%M'), longitude, apply_solar)
+        + f'<div style="text-align:center;font-size:11px;color:#8b6914;margin:-4px 0 6px;padding:2px 0;">입력 생년월일시 · 서기 {birth_display}</div>'
+        + render_saju_table(fp,ilgan)
+        + f'<div style="text-align:center;font-size:10px;color:#6b5a3e;margin:-6px 0 4px;">{calc_info}</div>',
         unsafe_allow_html=True
     )
     month_ji=fp['month'][1]
@@ -802,19 +1033,16 @@ def page_saju():
     for ci,col in enumerate(cols_du):
         real_idx=len(daeun)-1-ci
         item=daeun_rev[ci]
-        age=item['start_age']
-        g=CHEONGAN[item['g_idx']]; j=MONTH_JI[item['b_idx']]
+        age=item.start_age
+        g=CHEONGAN[item.g_idx]; j=MONTH_JI[item.b_idx]
         dy_year=birth_year+age
         with col:
             clicked=render_daeun_card(age,g,j,ilgan,real_idx==sel_du,f"du_{real_idx}",dy_year)
             if clicked:
                 st.session_state.sel_daeun=real_idx
                 birth_y=data['birth'][0]
-                du_start_age=item['start_age']
-                new_seun=[]
-                for i in range(100):
-                    sy=birth_y+i; off=(sy-4)%60
-                    new_seun.append((sy,CHEONGAN[off%10],JIJI[off%12]))
+                du_start_age=item.start_age
+                new_seun=[(sy,)+GANJI_PAIR60[(sy-4)%60] for sy in range(birth_y,birth_y+100)]
                 st.session_state.saju_data['seun']=new_seun
                 st.session_state.sel_seun=du_start_age
                 st.session_state.page='saju'
@@ -823,40 +1051,19 @@ def page_saju():
     sel_su=st.session_state.sel_seun
     seun=data["seun"]
     du_item=daeun[sel_du]
-    du_start=du_item['start_age']
+    du_start=du_item.start_age
     birth_y=data['birth'][0]
     if sel_du==0: seun_age_start=0
     else: seun_age_start=du_start
     seun_age_end=du_start+9
-    seun_range=[]
-    for age_i in range(seun_age_start, seun_age_end+1):
-        if age_i < len(seun):
-            sy,sg,sj=seun[age_i]
-            seun_range.append((age_i,sy,sg,sj))
-    seun_range_disp=list(reversed(seun_range))
-
-    seun_html='<div style="overflow-x:auto;-webkit-overflow-scrolling:touch;padding:4px 0 2px;">'
-    seun_html+='<div style="display:inline-flex;flex-wrap:nowrap;gap:2px;padding:0 2px;">'
-    for age_i,sy,sg,sj in seun_range_disp:
-        bg_g=GAN_BG.get(sg,"#888"); tc_g=gan_fg(sg)
-        bg_j=BR_BG.get(sj,"#888"); tc_j=br_fg(sj)
-        hj_sg=hanja_gan(sg); hj_sj=hanja_ji(sj)
-        six_g=six_for_stem(ilgan,sg); six_j=six_for_branch(ilgan,sj)
-        active=(age_i==sel_su)
-        bdr='2px solid #8b6914' if active else '1px solid #c8b87a'
-        bg_card='#d4c48a' if active else '#e8e4d8'
-        display_age = age_i + 1
-        seun_html+=(
-            f'<div style="display:flex;flex-direction:column;align-items:center;min-width:38px;border:{bdr};border-radius:8px;background:{bg_card};padding:3px 2px 2px;">'
-            f'<div style="font-size:9px;color:#6b5a3e;margin-bottom:1px;white-space:nowrap">{sy}</div>'
-            f'<div style="font-size:9px;color:#5a3e0a;margin-bottom:1px;white-space:nowrap">{six_g}</div>'
-            f'<div style="width:30px;height:30px;border-radius:5px;background:{bg_g};color:{tc_g};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;">{hj_sg}</div>'
-            f'<div style="width:30px;height:30px;border-radius:5px;background:{bg_j};color:{tc_j};display:flex;align-items:center;justify-content:center;font-size:16px;font-weight:900;margin-top:1px;">{hj_sj}</div>'
-            f'<div style="font-size:9px;color:#5a3e0a;margin-top:1px;white-space:nowrap">{six_j}</div>'
-            '</div>'
-        )
-    seun_html+='</div></div>'
-    st.markdown(seun_html, unsafe_allow_html=True)
+    seun_range_disp=[(age_i,)+seun[age_i]
+                     for age_i in range(min(seun_age_end,len(seun)-1), seun_age_start-1, -1)]
+
+    seun_parts=['<div style="overflow-x:auto;-webkit-overflow-scrolling:touch;padding:4px 0 2px;">'
+                '<div style="display:inline-flex;flex-wrap:nowrap;gap:2px;padding:0 2px;">']
+    seun_parts+=[_seun_card(sy,sg,sj,ilgan,age_i==sel_su) for age_i,sy,sg,sj in seun_range_disp]
+    seun_parts.append('</div></div>')
+    st.markdown(''.join(seun_parts), unsafe_allow_html=True)
 
     n_btn=len(seun_range_disp)
     if n_btn>0:
@@ -870,16 +1077,7 @@ def page_saju():
                     st.session_state.page='wolun'
                     st.rerun()
 
-    gpt_url='https://chatgpt.com/g/g-68d90b2d8f448191b87fb7511fa8f80a-rua-myeongrisajusangdamsa'
-    bottom_html = (
-        '<div class="bottom-btns">'
-        f'<a href="{gpt_url}" target="_blank" class="bottom-btn-ai">🤖 AI 챗봇 무료상담</a>'
-        '</div>'
-        '<div style="text-align:center;margin-top:6px;font-size:11px;">'
-        '<a href="https://www.youtube.com/@psycologysalon" target="_blank" style="color:#8b6914;text-decoration:none;">🎥 2025 상담학박사 루아코치 유튜브</a>'
-        '</div>'
-    )
-    st.markdown(bottom_html, unsafe_allow_html=True)
+    st.markdown(_BOTTOM_SAJU, unsafe_allow_html=True)
     show_interp = st.session_state.get('show_saju_interp', False)
     btn_label = '▲ 내 사주 해석 닫기' if show_interp else '📊 내 사주 해석 보기'
     if st.button(btn_label, key='show_saju_interp_btn', use_container_width=True):
@@ -893,7 +1091,6 @@ def page_saju():
 def page_wolun():
     data=st.session_state.saju_data
     if not data or 'fp' not in data: st.session_state.page='input'; st.rerun(); return
-    now=datetime.now(LOCAL_TZ)
     ilgan=data['ilgan']
     seun=data["seun"]
     sel_su=st.session_state.sel_seun
@@ -903,25 +1100,23 @@ def page_wolun():
     display_age = sel_su + 1
     st.markdown(f'<div class="sel-info">{sy}년 {display_age}세 {hj_sg}{hj_sj} 월운 ({six_for_stem(ilgan,sg)}/{six_for_branch(ilgan,sj)})</div>', unsafe_allow_html=True)
 
-    wolun=calc_wolun_accurate(sy)
+    wolun=calc_wolun_accurate(sy, data.get('longitude', DEFAULT_LONGITUDE), data.get('apply_solar', True))
     sel_wu=st.session_state.sel_wolun
     wolun_rev=list(reversed(wolun))
-    MONTH_KR=['1월','2월','3월','4월','5월','6월','7월','8월','9월','10월','11월','12월']
     for row_start in [6,0]:
         row_items=wolun_rev[row_start:row_start+6]
         cols=st.columns(len(row_items))
         for ci,col in enumerate(cols):
             if ci>=len(row_items): break
             real_wu=11-(row_start+ci)
-            wm=row_items[ci]["month"]
-            wg=row_items[ci]["gan"]; wj=row_items[ci]["ji"]
+            it=row_items[ci]
+            wm=it.month; wg=it.gan; wj=it.ji
             with col:
                 active=(real_wu==sel_wu)
-                bg_g=GAN_BG.get(wg,"#888"); tc_g=gan_fg(wg)
-                bg_j=BR_BG.get(wj,"#888"); tc_j=br_fg(wj)
+                bg_g,tc_g=GAN_CELL[wg]
+                bg_j,tc_j=BR_CELL[wj]
                 hj_wg=hanja_gan(wg); hj_wj=hanja_ji(wj)
-                bdr='2px solid #8b6914' if active else '1px solid #c8b87a'
-                bg_card='#d4c48a' if active else '#e8e4d8'
+                bdr=_CARD_BDR[active]; bg_card=_CARD_BG[active]
                 six_g=six_for_stem(ilgan,wg); six_j=six_for_branch(ilgan,wj)
                 st.markdown(
                     f'<div style="text-align:center;font-size:10px;color:#6b5a3e;margin-bottom:1px">{MONTH_KR[wm-1]}</div>'
@@ -938,17 +1133,7 @@ def page_wolun():
                     st.session_state.page='ilun'
                     st.rerun()
 
-    gpt_url='https://chatgpt.com/g/g-68d90b2d8f448191b87fb7511fa8f80a-rua-myeongrisajusangdamsa'
-    bottom_html = (
-        '<div class="bottom-btns">'
-        '<a href="https://open.kakao.com/o/sWJUYGDh" target="_blank" class="bottom-btn-saju" style="text-align:center;padding:12px 6px;text-decoration:none;">💬 이박사 오픈카카오톡</a>'
-        f'<a href="{gpt_url}" target="_blank" class="bottom-btn-ai">🤖 AI 챗봇 무료상담</a>'
-        '</div>'
-        '<div style="text-align:center;margin-top:6px;font-size:11px;">'
-        '<a href="https://www.youtube.com/@psycologysalon" target="_blank" style="color:#8b6914;text-decoration:none;">🎥 2025 상담학박사 루아코치 유튜브</a>'
-        '</div>'
-    )
-    st.markdown(bottom_html, unsafe_allow_html=True)
+    st.markdown(_BOTTOM_WOLUN, unsafe_allow_html=True)
 
 def page_ilun():
     data=st.session_state.saju_data
@@ -961,9 +1146,9 @@ def page_ilun():
     sel_su=st.session_state.sel_seun
     sy,sg,sj=seun[sel_su]
     sel_wu=st.session_state.sel_wolun
-    wolun=calc_wolun_accurate(sy)
+    wolun=calc_wolun_accurate(sy, longitude, apply_solar)
     wm_data=wolun[sel_wu]
-    wm=wm_data["month"]; wg=wm_data["gan"]; wj=wm_data["ji"]
+    wm=wm_data.month; wg=wm_data.gan; wj=wm_data.ji
     if st.button('← 월운으로'): st.session_state.page='wolun'; st.rerun()
     hj_wg=hanja_gan(wg); hj_wj=hanja_ji(wj)
     hj_sg=hanja_gan(sg); hj_sj=hanja_ji(sj)
@@ -973,14 +1158,8 @@ def page_ilun():
     _,days_in_month=cal_mod.monthrange(sy,wm)
     first_weekday,_=cal_mod.monthrange(sy,wm)
     first_wd=(first_weekday+1)%7
-    # 이 달의 절기 계산
-    jie24_this = compute_jie24_times_calc(sy)
-
-    if apply_solar:
-        for k in jie24_this:
-            jie24_this[k] = to_solar_time(jie24_this[k], longitude)
-
-    jie24_solar_ilun = jie24_this
+    # 이 달의 절기 — 경도 보정 맵은 (연도,경도)별 캐시를 그대로 읽는다
+    jie24_solar_ilun = _jie24_solar(sy, longitude) if apply_solar else _jie24_times_cached(sy)
     # 이 달의 절기 목록 (날짜 -> 절기명,시각)
     month_jie_map={}
     for jname,jt in jie24_solar_ilun.items():
@@ -991,41 +1170,41 @@ def page_ilun():
     month_terms_str=' / '.join([f"{v[0]} ({v[1].strftime('%d일 %H:%M')})" for k,v in month_terms_list])
     # 음력 변환
     def solar_to_lunar_str(y,m,d):
-        if not HAS_LUNAR: return ''
-        try:
-            c=KoreanLunarCalendar()
-            c.setSolarDate(y,m,d)
-            lm=c.lunarMonth; ld=c.lunarDay; is_l=c.isIntercalation
-            leap_str='윤' if is_l else ''
-            return f'{leap_str}{lm}/{ld}'
-        except: return ''
+        res=_solar_to_lunar(y,m,d)
+        if not res: return ''
+        lm,ld,is_l=res
+        leap_str='윤' if is_l else ''
+        return f'{leap_str}{lm}/{ld}'
+    # 경도 보정은 한 달 안에서 분 단위로만 변하고 정오 기준 일주 판정에는
+    # 영향이 없으므로, 월 중앙 기준 보정값 하나를 전체 날짜에 적용한다
+    month_corr=timedelta(0)
+    if apply_solar:
+        mid=datetime(sy,wm,15,12,0,tzinfo=LOCAL_TZ)
+        month_corr=to_solar_time(mid,longitude)-mid
+    # 정오 기준이라 보정을 더해도 날짜가 바뀌지 않는다 — 일주 인덱스는 첫날만 계산해 1씩 증가
+    dt1=datetime(sy,wm,1,12,0,tzinfo=LOCAL_TZ)
+    d1=(dt1+month_corr).date() if apply_solar else dt1.date()
+    idx=_day_idx60(d1.year,d1.month,d1.day)
     day_items=[]
     for d in range(1, days_in_month+1):
-        dt_local=datetime(sy,wm,d,12,0,tzinfo=LOCAL_TZ)
-
-        if apply_solar:
-            dt_solar = to_solar_time(dt_local, longitude)
-        else:
-            dt_solar = dt_local
-        dj,dc,djidx=day_ganji_solar(dt_solar)
-        g,j=dj[0],dj[1]
+        g,j=GANJI_PAIR60[idx]
         sg_six=six_for_stem(ilgan,g); sj_six=six_for_branch(ilgan,j)
         lunar_str=solar_to_lunar_str(sy,wm,d)
         jie_info=month_jie_map.get(d,None)
         jie_str=jie_info[0] if jie_info else ''
         day_items.append({'day':d,'gan':g,'ji':j,'sg_six':sg_six,'sj_six':sj_six,'lunar':lunar_str,'jie':jie_str})
+        idx=(idx+1)%60
 
-    html='<div class="cal-wrap">'
-    html+=f'<div class="cal-header">{sy}년({hj_sg}{hj_sj}) {wm}월({hj_wg}{hj_wj})</div>'
+    parts=['<div class="cal-wrap">', f'<div class="cal-header">{sy}년({hj_sg}{hj_sj}) {wm}월({hj_wg}{hj_wj})</div>']
     if month_terms_str:
-        html+=f'<div style="background:#f5eed8;padding:4px 8px;font-size:11px;color:#7a5a1a;text-align:center;border-bottom:1px solid #c8b87a;">🌿 절기: {month_terms_str}</div>'
-    html+='<table class="cal-table"><thead><tr>'
-    for dn in ['일','월','화','수','목','금','토']: html+=f'<th>{dn}</th>'
-    html+='</tr></thead><tbody><tr>'
-    for _ in range(first_wd): html+='<td class="empty"></td>'
+        parts.append(f'<div style="background:#f5eed8;padding:4px 8px;font-size:11px;color:#7a5a1a;text-align:center;border-bottom:1px solid #c8b87a;">🌿 절기: {month_terms_str}</div>')
+    parts.append('<table class="cal-table"><thead><tr>')
+    parts+=[f'<th>{dn}</th>' for dn in ['일','월','화','수','목','금','토']]
+    parts.append('</tr></thead><tbody><tr>')
+    parts+=['<td class="empty"></td>']*first_wd
     col_pos=first_wd
     for item in day_items:
-        if col_pos==7: html+='</tr><tr>'; col_pos=0
+        if col_pos==7: parts.append('</tr><tr>'); col_pos=0
         d_num=item["day"]; dow=(first_wd+d_num-1)%7
         is_today=(sy==now.year and wm==now.month and d_num==now.day)
         cls='today-cell' if is_today else ''
@@ -1036,20 +1215,13 @@ def page_ilun():
         lunar6=item.get("lunar",""); jie6=item.get("jie","")
         jie_html=f'<div style="font-size:8px;color:#b06000;font-weight:bold;">{jie6}</div>' if jie6 else ''
         lunar_html=f'<div style="font-size:8px;color:#5a5a8a;">{lunar6}</div>' if lunar6 else ''
-        html+=f'<td class="{cls.strip()}">{jie_html}<div class="dn">{d_num}</div>{lunar_html}<div style="font-size:9px;color:#888;">{sg6}</div><div style="font-size:14px;font-weight:bold;">{hj_dg}</div><div style="font-size:14px;font-weight:bold;">{hj_dj}</div><div style="font-size:9px;color:#888;">{sj6}</div></td>'
+        parts.append(f'<td class="{cls.strip()}">{jie_html}<div class="dn">{d_num}</div>{lunar_html}<div style="font-size:9px;color:#888;">{sg6}</div><div style="font-size:14px;font-weight:bold;">{hj_dg}</div><div style="font-size:14px;font-weight:bold;">{hj_dj}</div><div style="font-size:9px;color:#888;">{sj6}</div></td>')
         col_pos+=1
-    while col_pos%7!=0 and col_pos>0: html+='<td class="empty"></td>'; col_pos+=1
-    html+='</tr></tbody></table></div>'
-    st.markdown(html,unsafe_allow_html=True)
-
-    gpt_url='https://chatgpt.com/g/g-68d90b2d8f448191b87fb7511fa8f80a-rua-myeongrisajusangdamsa'
-    bottom_html = (
-        '<div class="bottom-btns">'
-        '<div class="bottom-btn-saju" style="text-align:center;padding:12px 6px;">📊 내 사주 해석 보기</div>'
-        f'<a href="{gpt_url}" target="_blank" class="bottom-btn-ai">🤖 AI 챗봇 무료상담</a>'
-        '</div>'
-    )
-    st.markdown(bottom_html, unsafe_allow_html=True)
+    while col_pos%7!=0 and col_pos>0: parts.append('<td class="empty"></td>'); col_pos+=1
+    parts.append('</tr></tbody></table></div>')
+    st.markdown(''.join(parts),unsafe_allow_html=True)
+
+    st.markdown(_BOTTOM_ILUN, unsafe_allow_html=True)
 
 if __name__=='__main__':
     main()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+build_jie_table.py
+═══════════════════════════════════════════════════════════════
+1900~2100년 24절기 시각을 미리 계산해 jie_table.json으로 저장.
+
+앱 기동 시 app_mobile._jie24_table()이 이 파일을 읽어
+절기 계산(연도당 24회 이분법 탐색)을 테이블 조회로 대체한다.
+
+사용법:
+    python build_jie_table.py
+"""
+import json
+import os
+
+from app_mobile import JIE24_ORDER, _jie24_times_compute
+
+START_YEAR = 1900
+END_YEAR = 2100
+
+def main():
+    rows = []
+    for year in range(START_YEAR, END_YEAR + 1):
+        # 기존 jie_table.json을 읽는 캐시 경로를 타면 재생성이 무의미해진다 — 항상 직접 계산
+        terms = _jie24_times_compute(year)
+        rows.append([int(terms[name].timestamp()) for name in JIE24_ORDER])
+    out = {'start': START_YEAR, 'order': JIE24_ORDER, 'epoch_sec': rows}
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jie_table.json')
+    with open(path, 'w', encoding='utf-8') as fp:
+        json.dump(out, fp)
+    print(f'{path}: {END_YEAR - START_YEAR + 1}년 × 24절기 저장 완료')
+
+if __name__ == '__main__':
+    main()
@@ -46,7 +46,7 @@ import math
 # ===================================================================
 # 1. 표준시 기간 정의 (standard_meridian in degrees East)
 # ===================================================================
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StandardTimePeriod:
     """하나의 표준시 기간을 나타낸다."""
     start: date          # 이 표준시가 적용되기 시작하는 날(포함)
@@ -98,7 +98,7 @@ _PERIODS: list[StandardTimePeriod] = [
 # ===================================================================
 # 2. 썸머타임(DST) 기록 — 양력 기준
 # ===================================================================
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DSTRecord:
     """하나의 서머타임 시행 기록."""
     year: int
@@ -228,29 +228,22 @@ def wall_to_true_solar_time(
     """
     d = dt_wall.date() if hasattr(dt_wall, 'date') else dt_wall
 
-    # --- 1) 벽시계 → UTC ---
+    # --- 1) 벽시계의 UTC 오프셋(분) ---
     if dt_wall.tzinfo is not None:
-        # timezone-aware: 직접 UTC 변환
-        dt_utc = dt_wall.astimezone(timezone.utc)
+        wall_offset_min = dt_wall.utcoffset().total_seconds() / 60.0
     else:
         # timezone-naive → 해당 날짜의 한국 벽시계로 간주
         wall_offset_min = get_wall_clock_utc_offset(d)
-        tz_wall = timezone(timedelta(minutes=wall_offset_min))
-        dt_utc = dt_wall.replace(tzinfo=tz_wall).astimezone(timezone.utc)
 
-    # --- 2) UTC → 지방평균시(LMT) ---
-    lmt_offset_min = longitude * 4.0   # 경도 1도 = 4분
-    dt_lmt = dt_utc + timedelta(minutes=lmt_offset_min)
-
-    # --- 3) LMT → 진태양시(TST) ---
+    # --- 2)+3) 보정을 한 번에 합산: -표준시오프셋 + 경도×4분 (+ 균시차) ---
+    wall_naive = dt_wall.replace(tzinfo=None)
+    total_min = longitude * 4.0 - wall_offset_min   # 경도 1도 = 4분
     if apply_eot:
-        eot = equation_of_time_minutes(dt_utc)
-        dt_tst = dt_lmt + timedelta(minutes=eot)
-    else:
-        dt_tst = dt_lmt
+        dt_utc = wall_naive - timedelta(minutes=wall_offset_min)
+        total_min += equation_of_time_minutes(dt_utc)
 
-    # timezone 정보 제거 (순수 태양시)
-    return dt_tst.replace(tzinfo=None, microsecond=0)
+    # timezone 정보 없는 순수 태양시
+    return (wall_naive + timedelta(minutes=total_min)).replace(microsecond=0)
 
 
 def wall_to_true_solar_time_historical(